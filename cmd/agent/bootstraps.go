@@ -13,7 +13,28 @@ package main
 //
 // Each also supports --persistent mode: stdin/stdout JSON loop.
 
-const bootstrapPython = `import json, sys, os, time as _time
+const bootstrapPython = `import json, sys, os, signal, time as _time
+
+# orjson is optional (e.g. shipped in /code/deps) and only used to encode
+# results. Requests are always parsed with json: orjson turns integers of
+# 2**64 and above into floats, which would change user payloads.
+try:
+    import orjson as _orjson
+except ImportError:
+    _orjson = None
+
+def _dumps(obj):
+    if _orjson is not None:
+        try:
+            return _orjson.dumps(obj, option=_orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # e.g. ints beyond 64 bits; let json handle or report it
+    return json.dumps(obj).encode()
+
+def _emit(obj):
+    sys.stdout.flush()
+    sys.stdout.buffer.write(_dumps(obj) + b"\n")
+    sys.stdout.buffer.flush()
 
 class _LambdaContext:
     def __init__(self):
@@ -42,9 +63,15 @@ def _load_handler():
     return ns["handler"]
 
 _handler = _load_handler()
+# A handler may block a signal to defer it until its response has been
+# written (e.g. a SIGTERM that cancelled it); the mask is restored after
+# each response, which delivers it.
+_sigmask = signal.pthread_sigmask(signal.SIG_BLOCK, [])
 
 if "--persistent" in sys.argv:
-    for line in sys.stdin:
+    # Requests are read as raw bytes; json parses bytes directly, so
+    # skipping the text layer avoids a separate decode per request.
+    for line in sys.stdin.buffer:
         line = line.strip()
         if not line:
             continue
@@ -56,15 +83,17 @@ if "--persistent" in sys.argv:
         ctx._start_ms = _time.time() * 1000
         try:
             result = _handler(req.get("input", {}), ctx)
-            print(json.dumps({"output": result}), flush=True)
+            _emit({"output": result})
         except Exception as e:
-            print(json.dumps({"error": str(e)}), flush=True)
+            _emit({"error": str(e)})
+        signal.pthread_sigmask(signal.SIG_SETMASK, _sigmask)
 else:
-    with open(sys.argv[1]) as f:
-        event = json.load(f)
+    with open(sys.argv[1], "rb") as f:
+        event = json.loads(f.read())
     ctx = _LambdaContext()
     result = _handler(event, ctx)
-    print(json.dumps(result))
+    _emit(result)
+    signal.pthread_sigmask(signal.SIG_SETMASK, _sigmask)
 `
 
 const bootstrapNode = `const fs = require('fs');
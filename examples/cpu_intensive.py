@@ -1,31 +1,204 @@
 """CPU intensive function - calculate prime numbers"""
 
+import math
 import time
 
+# Wheel positions per sieve segment. Each position k holds two flags, for
+# 6k+1 and 6k+5, so a segment is 256 KiB and stays in L2.
+SEGMENT_SIZE = 1 << 17
+
+# Primes whose multiples are removed by tiling a precomputed pattern rather
+# than by crossing off; they are the densest and so the costliest to cross.
+PRESIEVE_PRIMES = (5, 7, 11, 13)
+
+# Miller-Rabin bases that are deterministic for every n < 2**64.
+_U64_BASES = (2, 325, 9375, 28178, 450775, 9780504, 1795265022)
+
+
+def _small_primes(bound):
+    """Odd-only Sieve of Eratosthenes returning all primes <= bound.
+
+    Index i stands for 2*i+1; crossing off starts at p*p with stride 2p,
+    done via slice assignment so the inner loop runs in C.
+    """
+    if bound < 2:
+        return []
+    size = (bound >> 1) + 1
+    flags = bytearray(b"\x01") * size
+    flags[0] = 0
+    if bound & 1 == 0:
+        flags[-1] = 0
+    for i in range(3, math.isqrt(bound) + 1, 2):
+        if flags[i >> 1]:
+            start = (i * i) >> 1
+            flags[start::i] = bytes(len(range(start, size, i)))
+    return [2] + [2 * i + 1 for i, v in enumerate(flags) if v]
+
+
+def _wheel_offsets(p):
+    """First wheel positions of multiples of p at or above p*p.
+
+    Returns (flag offset, k) pairs for the 6k+1 and 6k+5 residues; later
+    multiples in the same residue follow every p positions.
+    """
+    inv6 = pow(6, -1, p)
+    kmin = p * p // 6
+    offsets = []
+    for flag, r in ((0, 1), (1, 5)):
+        k = (-r * inv6) % p
+        if k < kmin:
+            k += (kmin - k + p - 1) // p * p
+        offsets.append((flag, k))
+    return offsets
+
+
+def _presieve_pattern(primes):
+    """One period of segment flags with every multiple of `primes` cleared.
+
+    The period is the product of the primes, in wheel positions, so a
+    segment starting at any klo is a rotation of this pattern.
+    """
+    period = math.prod(primes)
+    flags = bytearray(b"\x01") * (2 * period)
+    for p in primes:
+        inv6 = pow(6, -1, p)
+        step = 2 * p
+        for flag, r in ((0, 1), (1, 5)):
+            start = 2 * ((-r * inv6) % p) + flag
+            flags[start::step] = bytes(len(range(start, len(flags), step)))
+    return bytes(flags)
+
+
+_PATTERN = _presieve_pattern(PRESIEVE_PRIMES)
+
+
+def _segmented(klo, khi, small_primes):
+    """Sieve flags for numbers of the form 6k+1 and 6k+5, k in [klo, khi).
+
+    Index i of the segment stands for 6*klo + 3*i + 1 + (i & 1), i.e. even
+    indices are 6k+1 and odd indices 6k+5, which skips all multiples of 2
+    and 3 and uses a third of a byte per integer.
+    """
+    size = 2 * (khi - klo)
+    off = (2 * klo) % len(_PATTERN)
+    reps = (off + size) // len(_PATTERN) + 1
+    flags = bytearray(memoryview(_PATTERN * reps)[off:off + size])
+    if klo == 0:
+        flags[0] = 0  # 1 is not prime
+    for p in PRESIEVE_PRIMES:
+        # The pattern also clears the presieve primes themselves.
+        if klo <= p // 6 < khi:
+            flags[2 * (p // 6 - klo) + (p % 6 == 5)] = 1
+    for p, offsets in small_primes:
+        if p * p >= 6 * khi:
+            break
+        for flag, k in offsets:
+            if k < klo:
+                k += (klo - k + p - 1) // p * p
+            start = 2 * (k - klo) + flag
+            if start < size:
+                step = 2 * p
+                flags[start::step] = bytes(len(range(start, size, step)))
+    return flags
+
+
+def _segments(limit):
+    """Yield (base, flags) per segment, flag i standing for base + 3*i + (i & 1)."""
+    small = [
+        (p, _wheel_offsets(p))
+        for p in _small_primes(math.isqrt(limit))
+        if p > PRESIEVE_PRIMES[-1]
+    ]
+    kend = limit // 6 + 1
+    for klo in range(0, kend, SEGMENT_SIZE):
+        khi = min(klo + SEGMENT_SIZE, kend)
+        flags = _segmented(klo, khi, small)
+        base = 6 * klo + 1
+        if khi == kend:
+            # The last wheel position may overshoot limit.
+            for i in (len(flags) - 1, len(flags) - 2):
+                if base + 3 * i + (i & 1) > limit:
+                    flags[i] = 0
+        yield base, flags
+
+
+def count_primes(limit, tail=10):
+    """Return (count, last `tail` primes) for primes <= limit.
+
+    No per-prime Python objects are created: each segment is counted with
+    bytearray.count and only the last few hits are decoded.
+    """
+    if limit < 2:
+        return 0, []
+    head = [2, 3] if limit >= 3 else [2]
+    count = len(head)
+    last = head[max(0, len(head) - tail):]
+    for base, flags in _segments(limit):
+        count += flags.count(1)
+        hits = []
+        i = len(flags)
+        while len(hits) < tail:
+            i = flags.rfind(1, 0, i)
+            if i < 0:
+                break
+            hits.append(base + 3 * i + (i & 1))
+        if hits:
+            last = (last + hits[::-1])[-tail:]
+    return count, last
+
 
 def is_prime(n):
+    """Miller-Rabin primality test, exact for n < 2**64.
+
+    O(log^3 n) per call, for checking single large numbers where sieving
+    up to n is out of the question.
+    """
     if n < 2:
         return False
-    for i in range(2, int(n**0.5) + 1):
-        if n % i == 0:
+    for p in (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37):
+        if n % p == 0:
+            return n == p
+    r, d = 0, n - 1
+    while d % 2 == 0:
+        r += 1
+        d //= 2
+    for a in _U64_BASES:
+        a %= n
+        if a == 0:
+            continue
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(r - 1):
+            x = pow(x, 2, n)
+            if x == n - 1:
+                break
+        else:
             return False
     return True
 
 
 def handler(event, context):
+    if "n" in event:
+        n = event["n"]
+        start = time.time()
+        result = is_prime(n)
+        return {
+            "n": n,
+            "is_prime": result,
+            "elapsed_ms": int((time.time() - start) * 1000),
+        }
+
     limit = event.get("limit", 10000)
     start = time.time()
 
-    primes = []
-    for n in range(2, limit + 1):
-        if is_prime(n):
-            primes.append(n)
+    count, last_10 = count_primes(limit)
 
     elapsed_ms = int((time.time() - start) * 1000)
 
     return {
         "limit": limit,
-        "count": len(primes),
-        "last_10": primes[-10:] if len(primes) >= 10 else primes,
+        "count": count,
+        "last_10": last_10,
         "elapsed_ms": elapsed_ms,
     }
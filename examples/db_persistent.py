@@ -16,30 +16,82 @@ Usage:
 
 import os
 import sys
+import time
 
 _db_conn = None
 
+# Seconds a connection may go without a SELECT 1 liveness probe.
+PROBE_INTERVAL_S = float(os.environ.get("DB_PROBE_INTERVAL_S", "30"))
+_db_probed_at = 0.0
+
+# Rows pulled per round trip; results are returned column-oriented.
+FETCH_SIZE = 1000
+
+
+def _decode_raw(value):
+    """JSON-safe form of a value psycopg returned as raw binary bytes."""
+    try:
+        return value.decode("utf-8")
+    except UnicodeDecodeError:
+        return value.hex()
+
+
+def _fetch_rows(cur):
+    """Fetch all rows of the current result in FETCH_SIZE batches.
+
+    A binary cursor hands back bytes for column types psycopg has no binary
+    loader for, such as user-defined enums and many extension types. Those
+    columns are decoded as UTF-8 (an enum's binary form is its label), or
+    hex-encoded when the binary form is not text.
+    """
+    from psycopg import pq
+
+    raw = [
+        i
+        for i, desc in enumerate(cur.description)
+        if cur.adapters.get_loader(desc.type_code, pq.Format.BINARY) is None
+    ]
+    rows = []
+    while batch := cur.fetchmany(FETCH_SIZE):
+        if raw:
+            batch = [list(row) for row in batch]
+            for row in batch:
+                for i in raw:
+                    if isinstance(row[i], bytes):
+                        row[i] = _decode_raw(row[i])
+        rows.extend(batch)
+    return rows
+
 
 def get_connection():
-    global _db_conn
+    global _db_conn, _db_probed_at
 
     if _db_conn is not None:
-        try:
-            _db_conn.cursor().execute("SELECT 1")
-            return _db_conn
-        except:
-            _db_conn = None
+        # closed/broken come from libpq's cached state and cost no round
+        # trip; only probe with SELECT 1 once the connection has gone stale.
+        if not _db_conn.closed and not _db_conn.broken:
+            if time.monotonic() - _db_probed_at < PROBE_INTERVAL_S:
+                return _db_conn
+            try:
+                _db_conn.execute("SELECT 1")
+                _db_probed_at = time.monotonic()
+                return _db_conn
+            except:
+                pass
+        _db_conn = None
 
-    import psycopg2
+    import psycopg
 
-    _db_conn = psycopg2.connect(
+    _db_conn = psycopg.connect(
         host=os.environ.get("DB_HOST", "172.30.0.1"),
         port=int(os.environ.get("DB_PORT", "5432")),
         dbname=os.environ.get("DB_NAME", "mydb"),
         user=os.environ.get("DB_USER", "nova"),
         password=os.environ.get("DB_PASSWORD", "secret"),
+        autocommit=True,
+        prepare_threshold=1,
     )
-    _db_conn.autocommit = True
+    _db_probed_at = time.monotonic()
     print("[db] Connection established", file=sys.stderr)
     return _db_conn
 
@@ -49,15 +101,15 @@ def handler(event, context):
     params = event.get("params", [])
 
     conn = get_connection()
-    cur = conn.cursor()
+    cur = conn.cursor(binary=True)
 
     try:
         cur.execute(query, params)
 
         if cur.description:
             columns = [desc[0] for desc in cur.description]
-            rows = [dict(zip(columns, row)) for row in cur.fetchall()]
-            return {"rows": rows, "count": len(rows)}
+            rows = _fetch_rows(cur)
+            return {"columns": columns, "rows": rows, "count": len(rows)}
         else:
             return {"affected": cur.rowcount}
     except Exception as e:
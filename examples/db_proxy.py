@@ -9,18 +9,55 @@ import socket
 PROXY_HOST = "172.30.0.1"
 PROXY_PORT = 6432  # PgBouncer 端口
 
+# 每批拉取的行数，结果按列名 + 行数组返回
+FETCH_SIZE = 1000
+
+
+def _decode_raw(value):
+    """把 psycopg 以原始二进制 bytes 返回的值转成可 JSON 编码的形式"""
+    try:
+        return value.decode("utf-8")
+    except UnicodeDecodeError:
+        return value.hex()
+
+
+def _fetch_rows(cur):
+    """按 FETCH_SIZE 分批拉取当前结果的全部行
+
+    二进制游标对 psycopg 没有二进制 loader 的类型（自定义枚举、很多扩展类型）
+    直接返回 bytes。这些列按 UTF-8 解码（枚举的二进制形式就是其标签），
+    不是文本的二进制形式则转为十六进制字符串。
+    """
+    from psycopg import pq
+
+    raw = [
+        i
+        for i, desc in enumerate(cur.description)
+        if cur.adapters.get_loader(desc.type_code, pq.Format.BINARY) is None
+    ]
+    rows = []
+    while batch := cur.fetchmany(FETCH_SIZE):
+        if raw:
+            batch = [list(row) for row in batch]
+            for row in batch:
+                for i in raw:
+                    if isinstance(row[i], bytes):
+                        row[i] = _decode_raw(row[i])
+        rows.extend(batch)
+    return rows
+
 
 def handler(event):
     """
     通过连接池代理访问数据库
     VM 每次建立短连接到代理，代理复用长连接到数据库
     """
-    import psycopg2
+    import psycopg
 
     query = event.get("query", "SELECT 1")
 
     # 连接到代理而非直接连数据库
-    conn = psycopg2.connect(
+    conn = psycopg.connect(
         host=PROXY_HOST,
         port=PROXY_PORT,
         dbname="mydb",
@@ -28,16 +65,18 @@ def handler(event):
         password="secret",
         # 关键：短连接模式，用完即关
         connect_timeout=5,
+        # PgBouncer 事务池模式下服务端连接不固定，不能使用服务端预编译语句
+        prepare_threshold=None,
     )
 
     try:
-        cur = conn.cursor()
+        cur = conn.cursor(binary=True)
         cur.execute(query)
 
         if cur.description:
             columns = [desc[0] for desc in cur.description]
-            rows = [dict(zip(columns, row)) for row in cur.fetchall()]
-            return {"rows": rows, "count": len(rows)}
+            rows = _fetch_rows(cur)
+            return {"columns": columns, "rows": rows, "count": len(rows)}
         else:
             return {"affected": cur.rowcount}
     finally:
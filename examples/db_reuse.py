@@ -2,45 +2,114 @@
 """
 Database function with connection reuse across invocations.
 
-This function maintains a persistent database connection that survives
+This function maintains a pool of database connections that survives
 across multiple invocations within the same VM lifecycle.
 
-The connection is established on first use and reused for subsequent calls.
+The pool is created on first use; each invocation borrows a connection
+and returns it afterwards, so concurrent invocations do not serialize on
+a single connection.
 """
 
 import json
 import sys
 import os
+import threading
 
-# 全局连接 - 在 VM 生命周期内复用
-_db_conn = None
+# 全局连接池 - 在 VM 生命周期内复用；多线程并发调用时各自取用独立连接
+_pool = None
+_pool_lock = threading.Lock()
+POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", "8"))
+# 建连超时；取连接时最多等待 POOL_TIMEOUT_S 秒（psycopg_pool 默认 30 秒）
+CONNECT_TIMEOUT_S = int(os.environ.get("DB_CONNECT_TIMEOUT_S", "5"))
+POOL_TIMEOUT_S = 10
 
+# 每批拉取的行数，结果按列名 + 行数组返回
+FETCH_SIZE = 1000
 
-def get_connection():
-    """获取或创建数据库连接"""
-    global _db_conn
 
-    if _db_conn is not None:
-        try:
-            # 检查连接是否有效
-            _db_conn.cursor().execute("SELECT 1")
-            return _db_conn
-        except:
-            _db_conn = None
-
-    # 创建新连接
-    import psycopg2
-
-    _db_conn = psycopg2.connect(
-        host=os.environ.get("DB_HOST", "172.30.0.1"),
-        port=int(os.environ.get("DB_PORT", "5432")),
-        dbname=os.environ.get("DB_NAME", "mydb"),
-        user=os.environ.get("DB_USER", "nova"),
-        password=os.environ.get("DB_PASSWORD", "secret"),
-    )
-    _db_conn.autocommit = True
-    print(f"[db] New connection established", file=sys.stderr)
-    return _db_conn
+def _decode_raw(value):
+    """把 psycopg 以原始二进制 bytes 返回的值转成可 JSON 编码的形式"""
+    try:
+        return value.decode("utf-8")
+    except UnicodeDecodeError:
+        return value.hex()
+
+
+def _fetch_rows(cur):
+    """按 FETCH_SIZE 分批拉取当前结果的全部行
+
+    二进制游标对 psycopg 没有二进制 loader 的类型（自定义枚举、很多扩展类型）
+    直接返回 bytes。这些列按 UTF-8 解码（枚举的二进制形式就是其标签），
+    不是文本的二进制形式则转为十六进制字符串。
+    """
+    from psycopg import pq
+
+    raw = [
+        i
+        for i, desc in enumerate(cur.description)
+        if cur.adapters.get_loader(desc.type_code, pq.Format.BINARY) is None
+    ]
+    rows = []
+    while batch := cur.fetchmany(FETCH_SIZE):
+        if raw:
+            batch = [list(row) for row in batch]
+            for row in batch:
+                for i in raw:
+                    if isinstance(row[i], bytes):
+                        row[i] = _decode_raw(row[i])
+        rows.extend(batch)
+    return rows
+
+
+def _check_connection(conn):
+    """取出连接时的零往返检查：只看 libpq 缓存的连接状态，不发送 SELECT 1"""
+    if conn.closed or conn.broken:
+        raise conn.OperationalError("connection is broken")
+
+
+def _on_connect(conn):
+    print("[db] New connection established", file=sys.stderr)
+
+
+def _get_pool():
+    """获取或创建连接池（首次调用时建立 1 个连接，最多 POOL_MAX_SIZE 个）"""
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                import psycopg
+                from psycopg_pool import ConnectionPool, PoolTimeout
+
+                kwargs = {
+                    "host": os.environ.get("DB_HOST", "172.30.0.1"),
+                    "port": int(os.environ.get("DB_PORT", "5432")),
+                    "dbname": os.environ.get("DB_NAME", "mydb"),
+                    "user": os.environ.get("DB_USER", "nova"),
+                    "password": os.environ.get("DB_PASSWORD", "secret"),
+                    "connect_timeout": CONNECT_TIMEOUT_S,
+                    "autocommit": True,
+                    "prepare_threshold": 1,
+                }
+                pool = ConnectionPool(
+                    min_size=1,
+                    max_size=POOL_MAX_SIZE,
+                    kwargs=kwargs,
+                    configure=_on_connect,
+                    check=_check_connection,
+                    timeout=POOL_TIMEOUT_S,
+                    open=True,
+                )
+                # 等首个连接建好再返回，数据库不可用时首次调用即快速失败
+                try:
+                    pool.wait(timeout=CONNECT_TIMEOUT_S + 1)
+                except PoolTimeout:
+                    # 连接池在后台重连时只记录日志，直接连一次以抛出真实错误
+                    # （如认证失败、连接被拒），否则抛出 PoolTimeout
+                    psycopg.connect(**kwargs).close()
+                    raise
+                _pool = pool
+    return _pool
 
 
 def handler(event):
@@ -54,32 +123,31 @@ def handler(event):
     query = event.get("query", "SELECT 1 as result")
     params = event.get("params", [])
 
-    conn = get_connection()
-    cur = conn.cursor()
-
-    try:
-        cur.execute(query, params)
-
-        if cur.description:
-            columns = [desc[0] for desc in cur.description]
-            rows = [dict(zip(columns, row)) for row in cur.fetchall()]
-            return {
-                "success": True,
-                "rows": rows,
-                "count": len(rows),
-            }
-        else:
+    # connection() 保证连接无论成功或出错都会归还，归还时连接池会重置或丢弃损坏的连接
+    with _get_pool().connection() as conn:
+        try:
+            with conn.cursor(binary=True) as cur:
+                cur.execute(query, params)
+
+                if cur.description:
+                    columns = [desc[0] for desc in cur.description]
+                    rows = _fetch_rows(cur)
+                    return {
+                        "success": True,
+                        "columns": columns,
+                        "rows": rows,
+                        "count": len(rows),
+                    }
+                else:
+                    return {
+                        "success": True,
+                        "affected": cur.rowcount,
+                    }
+        except Exception as e:
             return {
-                "success": True,
-                "affected": cur.rowcount,
+                "success": False,
+                "error": str(e),
             }
-    except Exception as e:
-        return {
-            "success": False,
-            "error": str(e),
-        }
-    finally:
-        cur.close()
 
 
 if __name__ == "__main__":
@@ -1,40 +1,106 @@
 """Disk I/O test function - write and read temporary files"""
 
+import array
+import errno
+import mmap
 import time
 import os
 
+# O_DIRECT bypasses the page cache; O_DSYNC makes each write durable on
+# return, replacing a separate fsync.
+_O_DIRECT = getattr(os, "O_DIRECT", 0)
+_O_DSYNC = getattr(os, "O_DSYNC", os.O_SYNC)
+# O_DIRECT transfers must be a multiple of the device's logical block
+# size; 4 KiB covers both 512-byte and 4 KiB devices.
+_DIRECT_ALIGN = 4096
+
+# Page-aligned buffers for the last size_kb, kept across invocations in
+# persistent mode. Anonymous mmaps start zero-filled, so the write data
+# needs no initialisation and untouched pages share the kernel's zero page.
+_DATA = {}
+_READ_BUFS = {}
+
+
+def _open_direct(path, flags, data, mode=0o600):
+    """Open path with O_DIRECT for I/O of data, falling back to buffered I/O.
+
+    O_DIRECT is skipped when len(data) is not block-aligned. Filesystems
+    such as tmpfs reject it at open, and some devices only on the first
+    transfer, so data is written once up front to find out. Returns the fd
+    and whether O_DIRECT is in effect.
+    """
+    if _O_DIRECT and len(data) % _DIRECT_ALIGN == 0:
+        try:
+            fd = os.open(path, flags | _O_DIRECT, mode)
+        except OSError as e:
+            if e.errno != errno.EINVAL:
+                raise
+        else:
+            try:
+                os.pwrite(fd, data, 0)
+                return fd, True
+            except OSError as e:
+                os.close(fd)
+                if e.errno != errno.EINVAL:
+                    raise
+    return os.open(path, flags, mode), False
+
+
+def _buffer(cache, size_kb):
+    """Buffer of size_kb from cache, which holds at most one.
+
+    A buffer of another size is unmapped first, so calls with varying
+    size_kb do not pin one buffer's worth of RSS per distinct size.
+    """
+    buf = cache.get(size_kb)
+    if buf is None:
+        for old in cache.values():
+            old.close()
+        cache.clear()
+        buf = cache[size_kb] = mmap.mmap(-1, size_kb * 1024)
+    return buf
+
 
 def handler(event, context):
     size_kb = event.get("size_kb", 1024)
     iterations = event.get("iterations", 10)
 
-    data = b"x" * (size_kb * 1024)
+    data = _buffer(_DATA, size_kb)
+    # Reads land in one reused buffer instead of a fresh bytes per read.
+    buf = _buffer(_READ_BUFS, size_kb)
     test_file = "/tmp/disk_test.bin"
 
-    results = {
-        "size_kb": size_kb,
-        "iterations": iterations,
-        "write_times_ms": [],
-        "read_times_ms": [],
-    }
-
-    for i in range(iterations):
-        start = time.time()
-        with open(test_file, "wb") as f:
-            f.write(data)
-            f.flush()
-            os.fsync(f.fileno())
-        results["write_times_ms"].append(int((time.time() - start) * 1000))
+    # Timings are kept in nanoseconds from the monotonic perf counter, in
+    # preallocated int64 arrays (no per-sample int objects), and only
+    # rounded to whole milliseconds for the per-iteration lists.
+    write_ns = array.array("q", bytes(8 * iterations))
+    read_ns = array.array("q", bytes(8 * iterations))
+    # One fd serves every iteration, so each one costs exactly two
+    # syscalls: a durable pwrite and a preadv.
+    fd, direct = _open_direct(test_file, os.O_RDWR | os.O_CREAT | _O_DSYNC, data)
+    try:
+        for i in range(iterations):
+            start = time.perf_counter_ns()
+            os.pwrite(fd, data, 0)
+            write_ns[i] = time.perf_counter_ns() - start
 
-        start = time.time()
-        with open(test_file, "rb") as f:
-            _ = f.read()
-        results["read_times_ms"].append(int((time.time() - start) * 1000))
+            start = time.perf_counter_ns()
+            os.preadv(fd, [buf], 0)
+            read_ns[i] = time.perf_counter_ns() - start
+    finally:
+        os.close(fd)
 
     os.remove(test_file)
 
-    results["avg_write_ms"] = sum(results["write_times_ms"]) / iterations
-    results["avg_read_ms"] = sum(results["read_times_ms"]) / iterations
+    results = {
+        "size_kb": size_kb,
+        "iterations": iterations,
+        "write_times_ms": [t // 1_000_000 for t in write_ns],
+        "read_times_ms": [t // 1_000_000 for t in read_ns],
+        "direct_io": direct,
+        "avg_write_ms": sum(write_ns) / iterations / 1e6,
+        "avg_read_ms": sum(read_ns) / iterations / 1e6,
+    }
     results["write_throughput_mbps"] = round(size_kb / 1024 / (results["avg_write_ms"] / 1000), 2)
     results["read_throughput_mbps"] = round(size_kb / 1024 / (results["avg_read_ms"] / 1000), 2)
 
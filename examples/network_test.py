@@ -1,9 +1,119 @@
 """Network test function - fetch external URL"""
 
+import base64
+import http.client
 import json
 import time
+import urllib.parse
 import urllib.request
-import urllib.error
+
+MAX_REDIRECTS = 5
+
+# Keep-alive connections per (scheme, host, proxy), reused across
+# invocations in persistent mode so repeat URLs skip the TCP and TLS
+# handshakes.
+_conns = {}
+
+
+def _proxy_for(scheme, netloc):
+    """Proxy URL for scheme from HTTP(S)_PROXY, or None if NO_PROXY exempts netloc."""
+    proxy = urllib.request.getproxies().get(scheme)
+    if not proxy or urllib.request.proxy_bypass(netloc):
+        return None
+    if "://" not in proxy:
+        proxy = "http://" + proxy
+    return proxy
+
+
+def _proxy_auth(proxy):
+    """Proxy-Authorization headers for credentials embedded in the proxy URL."""
+    parts = urllib.parse.urlsplit(proxy)
+    if parts.username is None:
+        return {}
+    cred = urllib.parse.unquote(parts.username) + ":" + urllib.parse.unquote(parts.password or "")
+    return {"Proxy-Authorization": "Basic " + base64.b64encode(cred.encode()).decode()}
+
+
+def _get_conn(key, timeout):
+    conn = _conns.get(key)
+    if conn is None:
+        scheme, netloc, proxy = key
+        if scheme not in ("http", "https"):
+            raise ValueError(f"unsupported URL scheme: {scheme!r}")
+        if proxy is None:
+            if scheme == "https":
+                conn = http.client.HTTPSConnection(netloc, timeout=timeout)
+            else:
+                conn = http.client.HTTPConnection(netloc, timeout=timeout)
+        else:
+            parts = urllib.parse.urlsplit(proxy)
+            host, port = parts.hostname, parts.port or 80
+            if scheme == "https":
+                # TLS to the origin runs inside a CONNECT tunnel, as urllib does.
+                conn = http.client.HTTPSConnection(host, port, timeout=timeout)
+                conn.set_tunnel(netloc, headers=_proxy_auth(proxy))
+            else:
+                conn = http.client.HTTPConnection(host, port, timeout=timeout)
+        _conns[key] = conn
+    else:
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+    return conn
+
+
+def _drop_conn(key):
+    conn = _conns.pop(key, None)
+    if conn is not None:
+        conn.close()
+
+
+def _get(url, timeout):
+    """GET url over a cached connection; returns (status, reason, body bytes).
+
+    A reused connection the server has since closed is retried once on a
+    fresh one. Redirects are followed and HTTP_PROXY, HTTPS_PROXY and
+    NO_PROXY are honoured like urllib does.
+    """
+    for _ in range(MAX_REDIRECTS + 1):
+        parts = urllib.parse.urlsplit(url)
+        proxy = _proxy_for(parts.scheme, parts.netloc)
+        key = (parts.scheme, parts.netloc, proxy)
+        headers = {"User-Agent": "Nova/1.0", "Connection": "keep-alive"}
+        if proxy is not None and parts.scheme == "http":
+            # A plain HTTP proxy takes the absolute URL as the request target.
+            path = urllib.parse.urlunsplit(parts._replace(fragment=""))
+            headers.update(_proxy_auth(proxy))
+        else:
+            path = parts.path or "/"
+            if parts.query:
+                path += "?" + parts.query
+
+        for attempt in range(2):
+            conn = _get_conn(key, timeout)
+            try:
+                conn.request("GET", path, headers=headers)
+                resp = conn.getresponse()
+                body = resp.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                _drop_conn(key)
+                if attempt:
+                    raise
+            except OSError:
+                _drop_conn(key)
+                raise
+
+        if resp.will_close:
+            _drop_conn(key)
+
+        location = resp.getheader("Location")
+        if resp.status in (301, 302, 303, 307, 308) and location:
+            url = urllib.parse.urljoin(url, location)
+            continue
+        return resp.status, resp.reason, body
+
+    raise http.client.HTTPException(f"too many redirects (>{MAX_REDIRECTS})")
 
 
 def handler(event, context):
@@ -12,20 +122,17 @@ def handler(event, context):
 
     start = time.time()
     try:
-        req = urllib.request.Request(url, headers={"User-Agent": "Nova/1.0"})
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            status = resp.status
-            body = resp.read().decode("utf-8")
+        status, reason, raw = _get(url, timeout)
+        if status >= 400:
+            data = {"error": f"HTTP Error {status}: {reason}"}
+        else:
+            # Parse straight from bytes; only the preview of a non-JSON body
+            # is ever decoded to str. json rather than orjson keeps integers
+            # of 2**64 and above exact and accepts NaN/Infinity.
             try:
-                data = json.loads(body)
-            except:
-                data = body[:500]
-    except urllib.error.HTTPError as e:
-        status = e.code
-        data = {"error": str(e)}
-    except urllib.error.URLError as e:
-        status = 0
-        data = {"error": str(e.reason)}
+                data = json.loads(raw)
+            except ValueError:
+                data = raw[:500].decode("utf-8", "replace")
     except Exception as e:
         status = 0
         data = {"error": str(e)}
@@ -5,36 +5,58 @@ import json
 import sys
 import time
 
-def generate_prime(bits=512):
-    """Generate a probable prime number using simple method"""
+try:
+    import gmpy2  # optional, e.g. from /code/deps; libgmp primality and inverse
+except ImportError:
+    gmpy2 = None
+
+# Miller-Rabin bases that are deterministic for every n < 2**64.
+_U64_BASES = (2, 325, 9375, 28178, 450775, 9780504, 1795265022)
+_SMALL_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)
+
+
+def _miller_rabin(n, bases):
+    """True if odd n > 2 is a strong probable prime to every base"""
+    r, d = 0, n - 1
+    while d % 2 == 0:
+        r += 1
+        d //= 2
+
+    for a in bases:
+        a %= n
+        if a == 0:
+            continue
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(r - 1):
+            x = pow(x, 2, n)
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def is_probable_prime(n, k=10):
+    """Exact below 2**64, otherwise k rounds of Miller-Rabin with random bases"""
     import random
 
-    def is_probable_prime(n, k=10):
-        if n < 2:
-            return False
-        if n == 2 or n == 3:
-            return True
-        if n % 2 == 0:
-            return False
+    if gmpy2 is not None:
+        return gmpy2.is_prime(n, k) > 0
+    if n < 2:
+        return False
+    for p in _SMALL_PRIMES:
+        if n % p == 0:
+            return n == p
+    if n < 1 << 64:
+        return _miller_rabin(n, _U64_BASES)
+    return _miller_rabin(n, (random.randrange(2, n - 1) for _ in range(k)))
+
 
-        # Miller-Rabin primality test
-        r, d = 0, n - 1
-        while d % 2 == 0:
-            r += 1
-            d //= 2
-
-        for _ in range(k):
-            a = random.randrange(2, n - 1)
-            x = pow(a, d, n)
-            if x == 1 or x == n - 1:
-                continue
-            for _ in range(r - 1):
-                x = pow(x, 2, n)
-                if x == n - 1:
-                    break
-            else:
-                return False
-        return True
+def generate_prime(bits=512):
+    """Generate a probable prime number using simple method"""
+    import random
 
     while True:
         candidate = random.getrandbits(bits) | (1 << bits - 1) | 1
@@ -58,15 +80,21 @@ def handler(event):
 
     # Compute private exponent
     def mod_inverse(a, m):
-        def extended_gcd(a, b):
-            if a == 0:
-                return b, 0, 1
-            gcd, x1, y1 = extended_gcd(b % a, a)
-            return gcd, y1 - (b // a) * x1, x1
-        _, x, _ = extended_gcd(a % m, m)
-        return (x % m + m) % m
-
-    d = mod_inverse(e, phi)
+        # Iterative extended Euclid: no stack frame per step, no recursion limit
+        old_r, r = a % m, m
+        old_s, s = 1, 0
+        while r:
+            q = old_r // r
+            old_r, r = r, old_r - q * r
+            old_s, s = s, old_s - q * s
+        if old_r != 1:
+            raise ValueError("e is not invertible modulo phi")
+        return old_s % m
+
+    if gmpy2 is not None:
+        d = int(gmpy2.invert(e, phi))
+    else:
+        d = mod_inverse(e, phi)
 
     elapsed = time.time() - start
 
@@ -1,17 +1,59 @@
 """Timeout test function - sleeps for specified duration"""
 
+import signal
+import threading
 import time
 
+# A SIGTERM during a sleep cancels it: the handler returns early with
+# status "cancelled" and the process terminates once the bootstrap has
+# written that response. While idle, SIGTERM terminates right away.
+_cancel = threading.Event()
+_sleeping = False
+_prev_sigterm = signal.SIG_DFL
+
+
+def _terminate(signum):
+    """Hand signum back to the disposition it had before, SIG_DFL by default."""
+    signal.signal(signum, _prev_sigterm)
+    signal.raise_signal(signum)
+
+
+def _on_sigterm(signum, frame):
+    if _sleeping:
+        _cancel.set()
+    else:
+        _terminate(signum)
+
+
+try:
+    _prev_sigterm = signal.signal(signal.SIGTERM, _on_sigterm)
+    if _prev_sigterm is None:
+        _prev_sigterm = signal.SIG_DFL  # installed outside Python
+except ValueError:
+    pass  # not loaded from the main thread; sleeps are not cancellable
+
 
 def handler(event, context):
+    global _sleeping
     sleep_seconds = event.get("sleep_seconds", 5)
 
+    _cancel.clear()
     start = time.time()
-    time.sleep(sleep_seconds)
+    _sleeping = True
+    try:
+        cancelled = _cancel.wait(sleep_seconds)
+    finally:
+        _sleeping = False
     elapsed = time.time() - start
 
+    if cancelled:
+        # Keep the re-raised SIGTERM pending until the bootstrap restores
+        # its signal mask after writing the "cancelled" response.
+        signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGTERM})
+        _terminate(signal.SIGTERM)
+
     return {
         "requested_sleep": sleep_seconds,
         "actual_sleep": round(elapsed, 2),
-        "status": "completed",
+        "status": "cancelled" if cancelled else "completed",
     }